@@ -5,6 +5,7 @@ import sys
 import threading
 import os
 import runpy  # Used to run scripts safely
+from dataclasses import asdict
 
 
 def get_base_path():
@@ -19,11 +20,17 @@ SCRIPT_REGISTER = os.path.join(BASE_PATH, "register.py")
 SCRIPT_TRAIN = os.path.join(BASE_PATH, "generate_embeddings.py")
 SCRIPT_RECOGNIZE = os.path.join(BASE_PATH, "recognize.py")
 SCRIPT_MANAGE = os.path.join(BASE_PATH, "manage_records.py")
+SCRIPT_EVALUATE = os.path.join(BASE_PATH, "evaluate_threshold.py")
+SCRIPT_REPORT = os.path.join(BASE_PATH, "attendance_report.py")
 
 MAIN_LIST_FILE = os.path.join(BASE_PATH, "records", "main_list.csv")
+MATRIX_FILE = os.path.join(BASE_PATH, "records", "attendance_matrix.npz")
 CONFIG_FOLDER = os.path.join(BASE_PATH, "config")
 PASS_FILE = os.path.join(CONFIG_FOLDER, "admin_pass.txt")
 
+sys.path.insert(0, BASE_PATH)
+from settings import load_settings, save_site_settings, describe_sections, SettingsError
+
 
 # This block detects if the EXE is being used as a worker or a GUI
 if len(sys.argv) > 1 and sys.argv[1] == "--run-script":
@@ -99,6 +106,12 @@ class FaceRecognitionSystem:
                    command=self.change_admin_password).grid(row=2, column=1, padx=10, pady=5)
         ttk.Button(ops_frame, text="Stop Process", width=20, 
                    command=self.stop_process).grid(row=0, column=2, padx=10)
+        ttk.Button(ops_frame, text="Settings (Admin)", width=20, 
+                   command=self.open_settings).grid(row=1, column=2, padx=10)
+        ttk.Button(ops_frame, text="Calibrate Threshold", width=20, 
+                   command=lambda: self.run_script(SCRIPT_EVALUATE)).grid(row=2, column=2, padx=10)
+        ttk.Button(ops_frame, text="Attendance Report", width=25, 
+                   command=lambda: self.run_script(SCRIPT_REPORT, ["summary"])).grid(row=3, column=0, padx=10, pady=5)
 
         # Logs
         log_frame = ttk.LabelFrame(content, text="System Logs", padding=10)
@@ -211,6 +224,8 @@ class FaceRecognitionSystem:
         if self.verify_admin():
             if os.path.exists(MAIN_LIST_FILE):
                 os.remove(MAIN_LIST_FILE)
+                if os.path.exists(MATRIX_FILE):
+                    os.remove(MATRIX_FILE)
                 self.log("Main list erased.")
             else: messagebox.showwarning("Error", "File not found.")
         else: messagebox.showerror("Error", "Wrong password.")
@@ -222,6 +237,57 @@ class FaceRecognitionSystem:
                 with open(PASS_FILE, "w") as f: f.write(p)
                 messagebox.showinfo("Success", "Password updated.")
 
+    def open_settings(self):
+        if not self.verify_admin():
+            messagebox.showerror("Error", "Wrong password.")
+            return
+
+        try:
+            current = asdict(load_settings(CONFIG_FOLDER))
+        except SettingsError as e:
+            messagebox.showerror("Settings", f"Current settings are invalid:\n{e}")
+            return
+
+        win = tk.Toplevel(self.root)
+        win.title("Site Settings")
+        win.resizable(False, False)
+
+        frame = ttk.Frame(win, padding=15)
+        frame.pack(fill="both", expand=True)
+
+        # One tab per schema section keeps the window short enough for
+        # small laptop screens
+        notebook = ttk.Notebook(frame)
+        notebook.grid(row=0, column=0, sticky="nsew")
+
+        entries = {}
+        for section, items in describe_sections():
+            tab = ttk.Frame(notebook, padding=10)
+            notebook.add(tab, text=section)
+            for row, (name, kind, help_text) in enumerate(items):
+                ttk.Label(tab, text=name).grid(row=row, column=0, sticky="w", padx=5, pady=2)
+                entry = ttk.Entry(tab, width=28)
+                entry.insert(0, str(current[name]))
+                entry.grid(row=row, column=1, padx=5, pady=2)
+                ttk.Label(tab, text=help_text, foreground="#666", wraplength=320).grid(
+                    row=row, column=2, sticky="w", padx=5)
+                entries[name] = entry
+
+        def save():
+            values = {name: entry.get() for name, entry in entries.items()}
+            try:
+                save_site_settings(values, CONFIG_FOLDER)
+            except SettingsError as e:
+                messagebox.showerror("Invalid Setting", str(e), parent=win)
+                return
+            self.log("Site settings saved. They apply the next time a script starts.")
+            win.destroy()
+
+        buttons = ttk.Frame(frame)
+        buttons.grid(row=1, column=0, pady=10)
+        ttk.Button(buttons, text="Save", command=save).pack(side="left", padx=5)
+        ttk.Button(buttons, text="Cancel", command=win.destroy).pack(side="left", padx=5)
+
     def open_main_list(self):
         if os.path.exists(MAIN_LIST_FILE):
             os.startfile(MAIN_LIST_FILE)
@@ -0,0 +1,455 @@
+import asyncio
+import json
+import os
+import csv
+import time
+from datetime import datetime
+from urllib.parse import urlsplit, parse_qs, unquote
+
+import cv2
+import numpy as np
+from deepface import DeepFace
+
+from settings import load_settings, SettingsError
+from face_gallery import get_stamp, build_gallery, load_gallery, match_batch
+from face_cache import face_to_bgr
+from liveness import LivenessChecker
+from manage_records import (
+    MAIN_FILE, get_registered_students, load_main_records, mark_attendance
+)
+
+
+# ------------------------------------------------
+# Local HTTP API
+#
+#   GET  /health                     service and gallery status
+#   GET  /attendance/today           who is present today, with times
+#   GET  /students                   registered students with percentages
+#   GET  /students/<name>            one student's day-by-day history
+#   GET  /summary                    headcount per day and per-student totals
+#   POST /recognize[?checkin=1]      raw image body -> best gallery match,
+#                                    optionally marking attendance
+#
+# Uploaded faces pass the texture/moire liveness stage before embedding
+# unless liveness_mode is "off"; a single still cannot be blink-checked.
+#
+# Concurrent uploads are queued into batches: faces are detected per image,
+# then the embedding model runs once over the stacked crops of the batch.
+#
+# Only the standard library is used for serving. Record files are indexed
+# in memory and re-read only when their mtime/size changes.
+# ------------------------------------------------
+
+STATUS_TEXT = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+# ================= RECORDS VIEW =================
+class RecordsView:
+
+    def __init__(self, attendance_path):
+        self.attendance_path = attendance_path
+        self.main_stamp = None
+        self.today_stamp = None
+        self.today = None
+
+        self.dates = []            # Column order of main_list.csv (+ today)
+        self.history = {}          # name -> {date: "Present" | "NR"}
+        self.today_present = {}    # name -> check-in time
+        self.headcount = {}        # date -> number present
+
+    def _today_file(self):
+        return os.path.join(self.attendance_path, f"{self.today}.csv")
+
+    def refresh(self):
+        today = datetime.now().strftime("%Y-%m-%d")
+        if today != self.today:
+            self.today = today
+            self.today_stamp = None
+
+        main_stamp = get_stamp(MAIN_FILE)
+        today_stamp = get_stamp(self._today_file())
+
+        if main_stamp == self.main_stamp and today_stamp == self.today_stamp and self.dates:
+            return
+
+        self.main_stamp = main_stamp
+        self.today_stamp = today_stamp
+        self._rebuild()
+
+    def _rebuild(self):
+        header, rows = load_main_records()
+
+        dates = header[1:] if header else []
+        history = {}
+        for row in rows:
+            if row:
+                history[row[0]] = dict(zip(dates, row[1:]))
+
+        today_present = {}
+        if os.path.exists(self._today_file()):
+            try:
+                with open(self._today_file(), "r", newline="") as f:
+                    for row in csv.DictReader(f):
+                        if row.get("Name"):
+                            today_present[row["Name"].strip()] = (row.get("Time") or "").strip()
+            except Exception as e:
+                print(f"Error reading attendance file: {e}")
+
+        # Fold today's live check-ins into the history view
+        if self.today not in dates:
+            dates = dates + [self.today]
+        for name in set(history) | set(today_present) | set(get_registered_students()):
+            days = history.setdefault(name, {d: "NR" for d in dates})
+            days.setdefault(self.today, "NR")
+            if name in today_present:
+                days[self.today] = "Present"
+
+        self.dates = dates
+        self.history = history
+        self.today_present = today_present
+        self.headcount = {
+            d: sum(1 for days in history.values() if days.get(d) == "Present") for d in dates
+        }
+
+    def student_summary(self, name):
+        days = self.history[name]
+        present = sum(1 for d in self.dates if days.get(d) == "Present")
+        total = len(self.dates)
+        return {
+            "name": name,
+            "present_days": present,
+            "total_days": total,
+            "percentage": round(100.0 * present / total, 2) if total else 0.0,
+        }
+
+
+# ================= RECOGNITION BATCHER =================
+class RecognitionBatcher:
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.queue = asyncio.Queue()
+        self.gallery = build_gallery({})
+        self.gallery_stamp = None
+        self.liveness = LivenessChecker(settings)
+
+    def refresh_gallery(self):
+        stamp = get_stamp(self.settings.encodings_path)
+        if stamp is None or stamp == self.gallery_stamp:
+            return
+
+        try:
+            self.gallery = load_gallery(self.settings.encodings_path, self.settings.gallery_audit_path)
+            self.gallery_stamp = stamp
+            print(f"Gallery loaded with {len(self.gallery[0])} people.")
+        except Exception as e:
+            print(f"Gallery reload failed: {e}")
+
+    async def recognize(self, image, checkin):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((image, checkin, future))
+        return await future
+
+    def _detect(self, image):
+        """Aligned BGR face crop and its box, or (None, reason)."""
+        faces = DeepFace.extract_faces(
+            img_path=image,
+            detector_backend=self.settings.recognition_detector,
+            enforce_detection=False,
+            align=True
+        )
+
+        h_image, w_image = image.shape[:2]
+        area = faces[0]["facial_area"] if faces else None
+
+        # With enforce_detection=False DeepFace falls back to the whole image
+        if not area or (area["w"], area["h"]) == (w_image, h_image):
+            return None, "No face detected."
+        return face_to_bgr(faces[0]["face"]), area
+
+    def _embed_batch(self, crops):
+        """One forward pass of the embedding model over every crop."""
+        if not crops:
+            return []
+
+        results = DeepFace.represent(
+            img_path=crops,
+            model_name=self.settings.model_name,
+            detector_backend="skip",
+            enforce_detection=False
+        )
+
+        # A list input gives one result list per image, except that
+        # deepface 0.0.98 unwraps the list when it holds a single image
+        if len(crops) == 1:
+            results = [results]
+        return [faces[0]["embedding"] for faces in results]
+
+    def _process(self, batch):
+        # Runs in a worker thread: detect per image, embed all faces of the
+        # batch in a single model call, then score them in one matrix product
+        self.refresh_gallery()
+
+        embedded = []
+        crops = []
+        for image, checkin, _ in batch:
+            try:
+                crop, area = self._detect(image)
+            except Exception as e:
+                crop, area = None, str(e)
+
+            # Stills cannot blink, so only the texture/moire stage applies
+            if crop is not None:
+                status = self.liveness.check_still(image, area)
+                if status != "live":
+                    crop, area = None, f"Rejected by liveness check: {status}"
+
+            if crop is not None:
+                crops.append(crop)
+            embedded.append([crop, area])
+
+        try:
+            vectors = iter(self._embed_batch(crops))
+            for item in embedded:
+                if item[0] is not None:
+                    item[0] = next(vectors)
+        except Exception as e:
+            print(f"Embedding failed for {len(crops)} face(s): {type(e).__name__}: {e}")
+            for item in embedded:
+                if item[0] is not None:
+                    item[0], item[1] = None, f"Embedding failed: {type(e).__name__}: {e}"
+
+        vectors = [emb for emb, _ in embedded if emb is not None]
+        matches = iter(match_batch(vectors, self.gallery, self.settings.match_margin))
+
+        responses = []
+        for (image, checkin, _), (embedding, area) in zip(batch, embedded):
+            if embedding is None:
+                error = area if isinstance(area, str) else "No face detected."
+                responses.append({"matched": False, "name": "Unknown", "error": error})
+                continue
+
+            name, score = next(matches)
+            matched = name != "Unknown" and score > (1 - self.settings.threshold)
+            response = {
+                "matched": matched,
+                "name": name if matched else "Unknown",
+                "score": round(score, 4),
+                "facial_area": area,
+            }
+            if matched and checkin:
+                response["marked"] = mark_attendance(name)
+            responses.append(response)
+
+        return responses
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.settings.api_batch_window
+
+            while len(batch) < self.settings.api_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                responses = await loop.run_in_executor(None, self._process, batch)
+            except Exception as e:
+                responses = [{"matched": False, "name": "Unknown", "error": str(e)}] * len(batch)
+
+            for (_, _, future), response in zip(batch, responses):
+                if not future.done():
+                    future.set_result(response)
+
+
+# ================= HTTP SERVER =================
+class AttendanceServer:
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.records = RecordsView(settings.attendance_path)
+        self.batcher = RecognitionBatcher(settings)
+        self.max_body = settings.api_max_upload_mb * 1024 * 1024
+        self.started = time.time()
+
+    # ---- routes ----
+    def route_get(self, path, query):
+        parts = [unquote(p) for p in path.strip("/").split("/") if p]
+
+        if parts == ["health"]:
+            return {
+                "status": "ok",
+                "uptime": round(time.time() - self.started, 1),
+                "gallery_size": len(self.batcher.gallery[0]),
+            }
+
+        self.records.refresh()
+
+        if parts == ["attendance", "today"]:
+            present = sorted(self.records.today_present.items())
+            return {
+                "date": self.records.today,
+                "count": len(present),
+                "present": [{"name": n, "time": t} for n, t in present],
+            }
+
+        if parts == ["students"]:
+            return {"students": [self.records.student_summary(n) for n in sorted(self.records.history)]}
+
+        if len(parts) == 2 and parts[0] == "students":
+            name = parts[1]
+            if name not in self.records.history:
+                raise HttpError(404, f"Unknown student: {name}")
+            result = self.records.student_summary(name)
+            result["history"] = self.records.history[name]
+            return result
+
+        if parts == ["summary"]:
+            students = [self.records.student_summary(n) for n in sorted(self.records.history)]
+            return {
+                "days": len(self.records.dates),
+                "students": len(students),
+                "headcount": self.records.headcount,
+                "absent_today": [
+                    s["name"] for s in students if s["name"] not in self.records.today_present
+                ],
+                "percentages": {s["name"]: s["percentage"] for s in students},
+            }
+
+        raise HttpError(404, f"No such endpoint: {path}")
+
+    async def route_post(self, path, query, body):
+        if path.rstrip("/") != "/recognize":
+            raise HttpError(404, f"No such endpoint: {path}")
+        if not body:
+            raise HttpError(400, "Send the image bytes as the request body.")
+
+        image = cv2.imdecode(np.frombuffer(body, np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            raise HttpError(400, "Body is not a decodable image.")
+
+        checkin = query.get("checkin", ["0"])[0].lower() in ("1", "true", "yes")
+        return await self.batcher.recognize(image, checkin)
+
+    # ---- connection handling ----
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self.respond(writer, 400, {"error": "Malformed request line."}, False)
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+
+                try:
+                    length = int(headers.get("content-length", 0))
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self.respond(writer, 400, {"error": "Invalid Content-Length."}, False)
+                    break
+                if length > self.max_body:
+                    await self.respond(writer, 413, {"error": "Upload too large."}, False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                url = urlsplit(target)
+                query = parse_qs(url.query)
+
+                try:
+                    if method == "GET":
+                        status, payload = 200, self.route_get(url.path, query)
+                    elif method == "POST":
+                        status, payload = 200, await self.route_post(url.path, query, body)
+                    else:
+                        raise HttpError(405, f"Method {method} not allowed.")
+                except HttpError as e:
+                    status, payload = e.status, {"error": e.message}
+                except Exception as e:
+                    status, payload = 500, {"error": str(e)}
+
+                await self.respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            "\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    async def serve(self):
+        self.batcher.refresh_gallery()
+        self.records.refresh()
+
+        asyncio.get_running_loop().create_task(self.batcher.run())
+
+        server = await asyncio.start_server(self.handle, self.settings.api_host, self.settings.api_port)
+        print(f"Attendance API listening on http://{self.settings.api_host}:{self.settings.api_port}")
+
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    try:
+        settings = load_settings()
+    except SettingsError as e:
+        print(f"Configuration error: {e}")
+        return
+
+    try:
+        asyncio.run(AttendanceServer(settings).serve())
+    except KeyboardInterrupt:
+        print("API stopped.")
+
+
+if __name__ == "__main__":
+    main()
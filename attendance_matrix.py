@@ -0,0 +1,113 @@
+import os
+import numpy as np
+
+
+# ------------------------------------------------
+# Compact attendance matrix (students x days)
+#
+# Saved next to records/main_list.csv as a bit-packed .npz: one bit per
+# student per day, so a semester of a few thousand students is a few
+# hundred KB and loads without parsing "Present"/"NR" strings.
+# ------------------------------------------------
+
+def from_records(header, rows):
+    """(names, dates, present) from main_list.csv header/rows."""
+    dates = list(header[1:]) if header else []
+    names = [row[0] for row in rows if row]
+
+    present = np.zeros((len(names), len(dates)), dtype=bool)
+    for i, row in enumerate(r for r in rows if r):
+        statuses = np.array(row[1:len(dates) + 1], dtype=object)
+        present[i, :len(statuses)] = statuses == "Present"
+
+    return names, dates, present
+
+
+def save_matrix(path, names, dates, present):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez_compressed(
+            f,
+            names=np.array(names, dtype=str),
+            dates=np.array(dates, dtype=str),
+            bits=np.packbits(present, axis=1),
+            days=np.array(len(dates))
+        )
+    os.replace(tmp_path, path)
+
+
+def load_matrix(path):
+    with np.load(path) as data:
+        days = int(data["days"])
+        present = np.unpackbits(data["bits"], axis=1, count=days).astype(bool)
+        return list(data["names"]), list(data["dates"]), present
+
+
+def load_or_build(path, main_file, load_records):
+    """Load the saved matrix, rebuilding it if main_list.csv is newer.
+
+    main_list.csv is the source of truth: once it is gone (e.g. erased by
+    the admin) the matrix is stale too, so it is removed and nothing is
+    reported.
+    """
+    if not os.path.exists(main_file):
+        if os.path.exists(path):
+            os.remove(path)
+        return [], [], np.zeros((0, 0), dtype=bool)
+
+    if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(main_file):
+        return load_matrix(path)
+
+    header, rows = load_records()
+    names, dates, present = from_records(header, rows)
+    if names:
+        save_matrix(path, names, dates, present)
+    return names, dates, present
+
+
+# ------------------------------------------------
+# Vectorized reports
+# ------------------------------------------------
+
+def percentages(present):
+    days = present.shape[1]
+    if days == 0:
+        return np.zeros(present.shape[0])
+    return 100.0 * present.sum(axis=1) / days
+
+
+def headcount(present):
+    return present.sum(axis=0)
+
+
+def longest_streaks(present):
+    """Longest run of consecutive Present days per student."""
+    n, days = present.shape
+    if n == 0 or days == 0:
+        return np.zeros(n, dtype=np.int64)
+
+    # +1 where a run starts, -1 one past where it ends
+    padded = np.zeros((n, days + 2), dtype=np.int8)
+    padded[:, 1:-1] = present
+    edges = np.diff(padded, axis=1)
+
+    start_rows, start_cols = np.nonzero(edges == 1)
+    _, end_cols = np.nonzero(edges == -1)
+
+    # nonzero walks row-major, so starts and ends pair up run by run
+    longest = np.zeros(n, dtype=np.int64)
+    np.maximum.at(longest, start_rows, end_cols - start_cols)
+    return longest
+
+
+def current_streaks(present):
+    """Consecutive Present days ending on the latest date."""
+    n, days = present.shape
+    if days == 0:
+        return np.zeros(n, dtype=np.int64)
+
+    absent_from_end = ~present[:, ::-1]
+    has_absence = absent_from_end.any(axis=1)
+    return np.where(has_absence, np.argmax(absent_from_end, axis=1), days)
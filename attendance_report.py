@@ -0,0 +1,117 @@
+import os
+import csv
+import argparse
+import numpy as np
+
+from manage_records import MAIN_FILE, MATRIX_FILE, RECORDS_PATH, load_main_records
+from attendance_matrix import (
+    load_or_build, percentages, headcount, longest_streaks, current_streaks
+)
+
+
+# ------------------------------------------------
+# Reports over the bit-packed attendance matrix
+#
+#   python attendance_report.py summary [--below 75]
+#   python attendance_report.py headcount
+#   python attendance_report.py absentees [--date YYYY-MM-DD]
+#   python attendance_report.py export --format csv|parquet [--out PATH]
+# ------------------------------------------------
+
+
+def report_summary(names, dates, present, below):
+    pct = percentages(present)
+    longest = longest_streaks(present)
+    current = current_streaks(present)
+    totals = present.sum(axis=1)
+
+    order = np.argsort(pct, kind="stable")
+    if below is not None:
+        order = order[pct[order] < below]
+
+    print(f"{'Name':<25}{'Present':>9}{'Days':>6}{'%':>8}{'Streak':>8}{'Best':>6}")
+    for i in order:
+        print(f"{names[i]:<25}{totals[i]:>9}{len(dates):>6}{pct[i]:>8.1f}{current[i]:>8}{longest[i]:>6}")
+
+    if len(names):
+        print(f"\nClass average: {pct.mean():.1f}% over {len(dates)} day(s)")
+
+
+def report_headcount(names, dates, present):
+    counts = headcount(present)
+    for date, count in zip(dates, counts):
+        print(f"{date}  {count:>4} / {len(names)}")
+
+
+def report_absentees(names, dates, present, date):
+    if not dates:
+        print("No attendance days recorded.")
+        return
+
+    date = date or dates[-1]
+    if date not in dates:
+        print(f"No records for {date}.")
+        return
+
+    absent = np.nonzero(~present[:, dates.index(date)])[0]
+    print(f"Absent on {date}: {len(absent)}")
+    for i in absent:
+        print(f"  {names[i]}")
+
+
+def export(names, dates, present, fmt, out):
+    out = out or os.path.join(RECORDS_PATH, f"attendance_matrix.{fmt}")
+
+    if fmt == "parquet":
+        try:
+            import pandas as pd
+            frame = pd.DataFrame(present, index=pd.Index(names, name="Name"), columns=dates)
+            frame.to_parquet(out)
+        except ImportError as e:
+            print(f"Parquet export needs pandas with pyarrow or fastparquet: {e}")
+            return
+    else:
+        with open(out, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["Name"] + dates)
+            for name, row in zip(names, present.astype(np.uint8)):
+                writer.writerow([name] + row.tolist())
+
+    print(f"Exported {len(names)} students x {len(dates)} days to {out}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Attendance reports from the compact attendance matrix.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    summary = sub.add_parser("summary", help="Percentage and streaks per student")
+    summary.add_argument("--below", type=float, default=None, help="Only students under this percentage")
+
+    sub.add_parser("headcount", help="Students present per day")
+
+    absentees = sub.add_parser("absentees", help="Students absent on a day")
+    absentees.add_argument("--date", default=None, help="YYYY-MM-DD (default: latest day)")
+
+    exporter = sub.add_parser("export", help="Write the matrix as CSV or Parquet")
+    exporter.add_argument("--format", choices=("csv", "parquet"), default="csv")
+    exporter.add_argument("--out", default=None, help="Output file")
+
+    args = parser.parse_args()
+
+    names, dates, present = load_or_build(MATRIX_FILE, MAIN_FILE, load_main_records)
+    if not names:
+        print("No attendance records found. Run Update Records first.")
+        return
+
+    if args.command == "summary":
+        report_summary(names, dates, present, args.below)
+    elif args.command == "headcount":
+        report_headcount(names, dates, present)
+    elif args.command == "absentees":
+        report_absentees(names, dates, present, args.date)
+    elif args.command == "export":
+        export(names, dates, present, args.format, args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+import os
+import csv
+import argparse
+import numpy as np
+
+from settings import load_settings, save_site_settings, SettingsError
+
+
+# ================= CONFIGURATION =================
+HIST_BINS = 2000          # Similarity resolution of 0.001 over [-1, 1]
+DEFAULT_TARGET_FAR = 0.001
+MAX_THRESHOLD = 1.0       # Upper bound of settings.threshold
+ROC_REPORT_FILE = os.path.join("records", "threshold_roc.csv")
+# =================================================
+
+
+def load_image_embeddings(path):
+    data = np.load(path)
+    embeddings = data["embeddings"].astype(np.float32)
+    labels = data["labels"]
+
+    # Re-normalize so dot products are cosine similarities
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True) + 1e-8
+
+    return embeddings, labels
+
+
+def _bin(scores):
+    bins = ((scores + 1.0) * (HIST_BINS / 2)).astype(np.int64)
+    np.clip(bins, 0, HIST_BINS - 1, out=bins)
+    return np.bincount(bins, minlength=HIST_BINS)
+
+
+def score_histograms(embeddings, label_ids, block_size):
+    """Leave-one-out genuine/impostor score histograms against templates.
+
+    recognize.py and the API match a probe against one L2-normalized mean
+    template per identity, so that is what is scored here. The genuine
+    score of an image is its similarity to its own identity's template
+    rebuilt without it (class sum minus the image, renormalized); its
+    impostor scores are its similarities to every other template. Probes
+    are processed block_size rows at a time, so memory stays at
+    O(block_size x identities).
+    """
+    n = len(embeddings)
+    genuine = np.zeros(HIST_BINS, dtype=np.int64)
+    impostor = np.zeros(HIST_BINS, dtype=np.int64)
+    if n == 0:
+        return genuine, impostor
+
+    k = int(label_ids.max()) + 1
+    sums = np.zeros((k, embeddings.shape[1]), dtype=np.float64)
+    np.add.at(sums, label_ids, embeddings)
+    counts = np.bincount(label_ids, minlength=k)
+    sum_sq = np.einsum("ij,ij->i", sums, sums)
+    norms = np.sqrt(sum_sq) + 1e-8
+
+    for r0 in range(0, n, block_size):
+        r1 = min(r0 + block_size, n)
+        rows = embeddings[r0:r1].astype(np.float64)
+        ids = label_ids[r0:r1]
+        own_col = (np.arange(r1 - r0), ids)
+
+        raw = rows @ sums.T
+        self_sq = np.einsum("ij,ij->i", rows, rows)
+
+        # |S - e|^2 = |S|^2 - 2 e.S + |e|^2, so the leave-one-out template
+        # needs no extra product. Singletons have nothing left to match.
+        own = raw[own_col]
+        rest = counts[ids] > 1
+        rest_norm = np.sqrt(np.maximum(sum_sq[ids] - 2 * own + self_sq, 0.0)) + 1e-8
+        genuine += _bin(((own - self_sq) / rest_norm)[rest])
+
+        others = np.ones(raw.shape, dtype=bool)
+        others[own_col] = False
+        impostor += _bin((raw / norms)[others])
+
+    return genuine, impostor
+
+
+def roc_from_histograms(genuine, impostor):
+    """FAR/FRR when accepting every score at or above each bin's lower edge."""
+    edges = np.linspace(-1.0, 1.0, HIST_BINS + 1)[:-1]
+
+    # Accepted impostors: counts in bins >= k. Rejected genuines: bins < k
+    far = np.cumsum(impostor[::-1])[::-1] / max(impostor.sum(), 1)
+    frr = (np.cumsum(genuine) - genuine) / max(genuine.sum(), 1)
+
+    return edges, far, frr
+
+
+def recommend(edges, far, frr, target_far):
+    """(EER bin, target-FAR bin); the latter is None when no bin reaches the target."""
+    eer_index = int(np.argmin(np.abs(far - frr)))
+
+    # Lowest FRR that keeps FAR within the target. When a whole range ties
+    # (well separated data), take its middle for the widest safety margin
+    ok = np.nonzero(far <= target_far)[0]
+    if not len(ok):
+        return eer_index, None
+
+    tied = ok[frr[ok] == frr[ok].min()]
+    return eer_index, int(tied[len(tied) // 2])
+
+
+def write_roc(path, edges, far, frr):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Similarity", "Threshold", "FAR", "FRR"])
+        # Every 10th bin keeps the report readable (0.01 steps)
+        for k in range(0, len(edges), 10):
+            writer.writerow([f"{edges[k]:.3f}", f"{1 - edges[k]:.3f}", f"{far[k]:.6f}", f"{frr[k]:.6f}"])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Calibrate the recognition threshold from per-image dataset embeddings."
+    )
+    parser.add_argument("--target-far", type=float, default=DEFAULT_TARGET_FAR,
+                        help="Maximum acceptable false accept rate (default: 0.001)")
+    parser.add_argument("--block-size", type=int, default=None,
+                        help="Rows/columns per similarity block (default: from settings)")
+    parser.add_argument("--roc-out", default=ROC_REPORT_FILE,
+                        help="Where to write the ROC table as CSV")
+    parser.add_argument("--apply", action="store_true",
+                        help="Save the recommended threshold to the site settings")
+    args = parser.parse_args()
+
+    try:
+        settings = load_settings()
+    except SettingsError as e:
+        print(f"Configuration error: {e}")
+        return
+
+    block_size = args.block_size or settings.similarity_block_size
+
+    if not os.path.exists(settings.image_embeddings_path):
+        print("Per-image embeddings not found! Please run training first.")
+        return
+
+    embeddings, labels = load_image_embeddings(settings.image_embeddings_path)
+    identities, label_ids = np.unique(labels, return_inverse=True)
+
+    print(f"Scoring {len(embeddings)} images of {len(identities)} identities "
+          f"(block size {block_size})...")
+
+    genuine, impostor = score_histograms(embeddings, label_ids, block_size)
+
+    if genuine.sum() == 0 or impostor.sum() == 0:
+        print("Need at least two identities, one of them with two or more images, to calibrate.")
+        return
+
+    edges, far, frr = roc_from_histograms(genuine, impostor)
+    eer_index, far_index = recommend(edges, far, frr, args.target_far)
+
+    current = 1 - settings.threshold
+    current_index = int(np.clip((current + 1.0) * (HIST_BINS / 2), 0, HIST_BINS - 1))
+
+    write_roc(args.roc_out, edges, far, frr)
+
+    print(f"\nGenuine scores:  {genuine.sum()}")
+    print(f"Impostor scores: {impostor.sum()}")
+    print(f"\nCurrent threshold     {settings.threshold:.3f}  "
+          f"FAR {far[current_index]:.4%}  FRR {frr[current_index]:.4%}")
+    print(f"Equal error rate      {1 - edges[eer_index]:.3f}  "
+          f"FAR {far[eer_index]:.4%}  FRR {frr[eer_index]:.4%}")
+    if far_index is not None:
+        print(f"FAR <= {args.target_far:.4%}      {1 - edges[far_index]:.3f}  "
+              f"FAR {far[far_index]:.4%}  FRR {frr[far_index]:.4%}")
+    print(f"\nROC table written to {args.roc_out}")
+
+    if far_index is None:
+        print(f"\nTarget FAR {args.target_far:.4%} is unreachable on this dataset: "
+              f"even the strictest threshold accepts {far[-1]:.4%} of impostors. "
+              f"Nothing recommended.")
+        if args.apply:
+            print("Threshold not applied.")
+        return
+
+    recommended = round(float(1 - edges[far_index]), 3)
+    if recommended > MAX_THRESHOLD:
+        # Below zero similarity; settings.threshold cannot express it, and
+        # the capped threshold is stricter, so FAR stays within the target
+        capped = min(int((1 - MAX_THRESHOLD + 1.0) * (HIST_BINS / 2)), HIST_BINS - 1)
+        print(f"\nThe target is met at threshold {recommended:.3f}, above the "
+              f"{MAX_THRESHOLD:.1f} maximum of the threshold setting. "
+              f"{MAX_THRESHOLD:.3f} gives FAR {far[capped]:.4%}  FRR {frr[capped]:.4%}; "
+              f"set it by hand if that FRR is acceptable.")
+        if args.apply:
+            print("Threshold not applied.")
+        return
+
+    print(f"\nRecommended THRESHOLD: {recommended:.3f}")
+
+    if args.apply:
+        try:
+            save_site_settings({"threshold": recommended})
+        except SettingsError as e:
+            print(f"Could not apply threshold: {e}")
+            return
+        print("Threshold saved to site settings.")
+
+
+if __name__ == "__main__":
+    main()
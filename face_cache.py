@@ -0,0 +1,159 @@
+import os
+import json
+import hashlib
+import threading
+
+import cv2
+import numpy as np
+import deepface
+from deepface import DeepFace
+
+
+# ------------------------------------------------
+# Persistent cache of aligned face crops for generate_embeddings.py
+#
+# Detection (RetinaFace by default) is the slowest training stage, and it
+# finds the same box in the same photo every run. Crops are stored once per
+# (file content hash, detector version) so retraining, or switching the
+# embedding model, skips detection entirely. Photos without a face are
+# cached too, so they are not re-scanned either.
+#
+#   <cache folder>/index.json                 key -> crop file + detection metadata
+#   <cache folder>/<sha1>_<detector hash>.png  aligned crop, BGR, lossless
+#
+# Entries and crops left by another detector or DeepFace version are
+# dropped on save, so upgrading never serves or keeps stale crops.
+# ------------------------------------------------
+
+INDEX_FILE = "index.json"
+NO_FACE_MESSAGE = "Face could not be detected"   # DeepFace's enforce_detection error
+
+
+def face_to_bgr(face):
+    """DeepFace.extract_faces output (RGB floats in [0, 1]) as a BGR uint8 image."""
+    return (np.clip(face, 0, 1) * 255).round().astype(np.uint8)[:, :, ::-1]
+
+
+def file_hash(path):
+    sha1 = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+
+class FaceCache:
+
+    def __init__(self, folder, detector_backend):
+        self.folder = folder
+        self.detector_backend = detector_backend
+        # Any change to the detector or the DeepFace release invalidates crops
+        version = getattr(deepface, "__version__", "unknown")
+        self.detector_key = f"{detector_backend}-aligned-deepface{version}"
+        self.crop_suffix = hashlib.sha1(self.detector_key.encode("utf-8")).hexdigest()[:12]
+
+        self.lock = threading.Lock()
+        self.seen = set()
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(folder, exist_ok=True)
+        self.index = self._load_index()
+
+    def _load_index(self):
+        path = os.path.join(self.folder, INDEX_FILE)
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except (ValueError, OSError) as e:
+            print(f"Face cache index unreadable, rebuilding: {e}")
+            return {}
+
+    def get_face(self, image_path):
+        """Aligned BGR uint8 crop for image_path, detecting only on a miss.
+
+        Raises ValueError when the photo has no detectable face, like
+        DeepFace does with enforce_detection=True.
+        """
+        digest = file_hash(image_path)
+        key = f"{digest}:{self.detector_key}"
+
+        with self.lock:
+            self.seen.add(key)
+            entry = self.index.get(key)
+
+        if entry is not None:
+            if entry.get("no_face"):
+                with self.lock:
+                    self.hits += 1
+                raise ValueError("No face detected (cached).")
+
+            face = cv2.imread(os.path.join(self.folder, entry["crop"]))
+            if face is not None:
+                with self.lock:
+                    self.hits += 1
+                return face
+
+        with self.lock:
+            self.misses += 1
+
+        try:
+            face_objs = DeepFace.extract_faces(
+                img_path=image_path,
+                detector_backend=self.detector_backend,
+                enforce_detection=True,
+                align=True
+            )
+        except ValueError as e:
+            # Only a clean "no face" result is worth remembering; unreadable
+            # or corrupt files raise ValueError too and must be retried
+            if NO_FACE_MESSAGE in str(e):
+                with self.lock:
+                    self.index[key] = {"source": image_path, "no_face": True}
+            raise
+
+        face_obj = face_objs[0]
+
+        # Store BGR uint8 like a loaded photo
+        face = face_to_bgr(face_obj["face"])
+
+        crop_name = f"{digest}_{self.crop_suffix}.png"
+        cv2.imwrite(os.path.join(self.folder, crop_name), face)
+
+        with self.lock:
+            self.index[key] = {
+                "source": image_path,
+                "crop": crop_name,
+                "facial_area": face_obj.get("facial_area"),
+                "confidence": face_obj.get("confidence"),
+            }
+
+        return face
+
+    def save(self):
+        """Write the index, dropping entries for photos that are gone and
+        entries from any other detector or DeepFace version."""
+        with self.lock:
+            stale = [
+                key for key in self.index
+                if not key.endswith(":" + self.detector_key) or key not in self.seen
+            ]
+            stale_crops = {self.index.pop(key).get("crop") for key in stale}
+            stale_crops -= {entry.get("crop") for entry in self.index.values()}
+            for crop in stale_crops:
+                if crop:
+                    try:
+                        os.remove(os.path.join(self.folder, crop))
+                    except OSError:
+                        pass
+
+            path = os.path.join(self.folder, INDEX_FILE)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "w") as f:
+                # Detector metadata may hold NumPy scalars
+                json.dump(self.index, f, default=lambda o: o.item() if hasattr(o, "item") else str(o))
+            os.replace(tmp_path, path)
+
+        print(f"Face cache: {self.hits} hit(s), {self.misses} detection(s), {len(stale)} stale entry(ies) removed.")
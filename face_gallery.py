@@ -0,0 +1,81 @@
+import os
+import json
+import pickle
+import numpy as np
+
+
+# ------------------------------------------------
+# Shared gallery helpers for recognize.py and attendance_api.py
+# A gallery is a (names, matrix, guard) tuple: one L2-normalized row per
+# identity, stacked once per load so matching is a single matrix product,
+# and for each row the index of its nearest neighbour when the training
+# audit flagged the pair as at risk of collision (-1 otherwise).
+# ------------------------------------------------
+
+def get_stamp(path):
+    """Cheap change marker for a file, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size)
+    except FileNotFoundError:
+        return None
+
+
+def build_gallery(database, margins=None):
+    names = list(database.keys())
+    if names:
+        matrix = np.stack([np.asarray(database[n], dtype=np.float32) for n in names])
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-8
+    else:
+        matrix = np.empty((0, 0), dtype=np.float32)
+
+    index = {name: i for i, name in enumerate(names)}
+    guard = np.full(len(names), -1, dtype=np.int64)
+    for name, info in (margins or {}).items():
+        if info.get("at_risk") and name in index and info.get("neighbor") in index:
+            guard[index[name]] = index[info["neighbor"]]
+
+    return names, matrix, guard
+
+
+def load_margins(path):
+    if not path or not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r") as f:
+            return json.load(f).get("margins", {})
+    except (ValueError, OSError) as e:
+        print(f"Ignoring gallery audit file: {e}")
+        return {}
+
+
+def load_gallery(path, audit_path=None):
+    with open(path, "rb") as f:
+        database = pickle.load(f)
+    return build_gallery(database, load_margins(audit_path))
+
+
+def match_batch(embeddings, gallery, min_gap=0.0):
+    """Best (name, score) for each query embedding, scored in one product.
+
+    An at-risk identity only wins if it beats its nearest neighbour by
+    min_gap; otherwise the query is reported as "Unknown".
+    """
+    names, matrix, guard = gallery
+    if not names or len(embeddings) == 0:
+        return [("Unknown", -1.0) for _ in embeddings]
+
+    queries = np.asarray(embeddings, dtype=np.float32).reshape(len(embeddings), -1)
+    queries = queries / (np.linalg.norm(queries, axis=1, keepdims=True) + 1e-8)
+
+    scores = queries @ matrix.T
+    best = np.argmax(scores, axis=1)
+
+    results = []
+    for i, j in enumerate(best):
+        rival = guard[j]
+        if rival >= 0 and scores[i, j] - scores[i, rival] < min_gap:
+            results.append(("Unknown", float(scores[i, j])))
+        else:
+            results.append((names[j], float(scores[i, j])))
+    return results
@@ -0,0 +1,144 @@
+import os
+import re
+import json
+import numpy as np
+
+
+# ------------------------------------------------
+# Post-training gallery audit
+#
+# Scores every pair of identities in the trained gallery, one
+# block x block tile at a time, and reports:
+#   - merge candidates: pairs so similar they are probably the same person
+#     stored under two folder names ("John" vs "john_s")
+#   - collisions: pairs close enough that one would be accepted as the other
+#   - clusters: connected groups of colliding identities
+# It also records each identity's nearest neighbour, which recognition
+# uses to demand a clear score gap before accepting an at-risk identity.
+# ------------------------------------------------
+
+
+def _name_key(name):
+    return re.sub(r"[^a-z]", "", name.lower())
+
+
+def _similar_names(a, b):
+    ka, kb = _name_key(a), _name_key(b)
+    return bool(ka and kb) and (ka.startswith(kb) or kb.startswith(ka))
+
+
+def _clusters(count, pairs):
+    parent = list(range(count))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j, _ in pairs:
+        parent[find(i)] = find(j)
+
+    groups = {}
+    for i, j, _ in pairs:
+        for k in (i, j):
+            groups.setdefault(find(k), set()).add(k)
+
+    return [sorted(g) for g in groups.values()]
+
+
+def audit_gallery(names, matrix, collision_similarity, duplicate_similarity, block_size):
+    """Nearest neighbours and close pairs for a (names, matrix) gallery.
+
+    Rows of matrix must be L2-normalized. Memory use is O(block_size^2).
+    """
+    n = len(names)
+    nn_index = np.full(n, -1, dtype=np.int64)
+    nn_score = np.full(n, -1.0, dtype=np.float32)
+    close_pairs = []
+
+    for r0 in range(0, n, block_size):
+        r1 = min(r0 + block_size, n)
+
+        for c0 in range(0, n, block_size):
+            c1 = min(c0 + block_size, n)
+
+            scores = matrix[r0:r1] @ matrix[c0:c1].T
+
+            # Never count an identity as its own neighbour
+            if r0 == c0:
+                np.fill_diagonal(scores, -np.inf)
+
+            best = np.argmax(scores, axis=1)
+            best_score = scores[np.arange(r1 - r0), best]
+            better = best_score > nn_score[r0:r1]
+            nn_score[r0:r1][better] = best_score[better]
+            nn_index[r0:r1][better] = best[better] + c0
+
+            # Each unordered pair once: only tiles on/above the diagonal
+            if c0 >= r0:
+                rows, cols = np.nonzero(scores >= collision_similarity)
+                for i, j in zip(rows + r0, cols + c0):
+                    if i < j:
+                        close_pairs.append((int(i), int(j), float(matrix[i] @ matrix[j])))
+
+    close_pairs.sort(key=lambda p: -p[2])
+
+    margins = {}
+    for i, name in enumerate(names):
+        if nn_index[i] < 0:
+            continue
+        margins[name] = {
+            "neighbor": names[nn_index[i]],
+            "similarity": round(float(nn_score[i]), 4),
+            "margin": round(float(1.0 - nn_score[i]), 4),
+            "at_risk": bool(nn_score[i] >= collision_similarity),
+        }
+
+    pair_report = [
+        {
+            "a": names[i],
+            "b": names[j],
+            "similarity": round(score, 4),
+            "merge_candidate": score >= duplicate_similarity,
+            "similar_names": _similar_names(names[i], names[j]),
+        }
+        for i, j, score in close_pairs
+    ]
+
+    clusters = [[names[k] for k in group] for group in _clusters(n, close_pairs)]
+
+    return {"margins": margins, "pairs": pair_report, "clusters": clusters}
+
+
+def print_report(report):
+    pairs = report["pairs"]
+    merges = [p for p in pairs if p["merge_candidate"]]
+
+    print("\nGallery audit:")
+    if not pairs:
+        print("  No colliding identities found.")
+        return
+
+    for p in merges:
+        hint = " (similar names)" if p["similar_names"] else ""
+        print(f"  MERGE CANDIDATE: {p['a']} <-> {p['b']} ({p['similarity']:.3f}){hint}")
+
+    for p in pairs:
+        if not p["merge_candidate"]:
+            print(f"  Too close: {p['a']} <-> {p['b']} ({p['similarity']:.3f})")
+
+    for cluster in report["clusters"]:
+        if len(cluster) > 2:
+            print(f"  Cluster: {', '.join(cluster)}")
+
+    print(f"  {len(merges)} merge candidate(s), {len(pairs)} colliding pair(s).")
+
+
+def save_report(report, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp_path, path)
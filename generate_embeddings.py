@@ -1,20 +1,42 @@
 import os
 import pickle
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from deepface import DeepFace
 
+from settings import load_settings, SettingsError
+from face_cache import FaceCache
+from face_gallery import build_gallery
+from gallery_audit import audit_gallery, print_report, save_report
+
 
 def main():
 
     # ================= CONFIGURATION =================
-    DATASET_PATH = "dataset"
-    ENCODINGS_PATH = "encodings/embeddings.pkl"
-    MODEL_NAME = "Facenet512"
-    DETECTOR_BACKEND = "retinaface"
-    MIN_IMAGES_REQUIRED = 5 
+    try:
+        settings = load_settings()
+    except SettingsError as e:
+        print(f"Configuration error: {e}")
+        return
+
+    DATASET_PATH = settings.dataset_path
+    ENCODINGS_PATH = settings.encodings_path
+    IMAGE_EMBEDDINGS_PATH = settings.image_embeddings_path
+    AUDIT_PATH = settings.gallery_audit_path
+    FACE_CACHE_PATH = settings.face_cache_path
+    MODEL_NAME = settings.model_name
+    DETECTOR_BACKEND = settings.training_detector
+    MIN_IMAGES_REQUIRED = settings.min_images_required
+    NUM_WORKERS = settings.num_workers
+    BATCH_SIZE = settings.batch_size
 
     database = {}
 
+    # Per-image vectors, kept for threshold calibration (evaluate_threshold.py)
+    image_embeddings = []
+    image_labels = []
+    image_paths = []
+
     # Ensure encodings folder exists
     os.makedirs(os.path.dirname(ENCODINGS_PATH), exist_ok=True)
 
@@ -24,6 +46,38 @@ def main():
         print("Dataset folder not found.")
         return
 
+    # Aligned crops are cached, so detection only runs on new or changed photos
+    face_cache = FaceCache(FACE_CACHE_PATH, DETECTOR_BACKEND)
+
+    def embed_image(image_path):
+        face = face_cache.get_face(image_path)
+
+        embedding_objs = DeepFace.represent(
+            img_path=face,
+            model_name=MODEL_NAME,
+            detector_backend="skip",
+            enforce_detection=False
+        )
+
+        embedding = np.array(embedding_objs[0]["embedding"])
+
+        # Normalize each embedding first
+        return embedding / (np.linalg.norm(embedding) + 1e-8)
+
+    def safe_embed(image_path):
+        try:
+            return embed_image(image_path), None
+        except Exception as e:
+            return None, e
+
+    pool = None
+    if NUM_WORKERS > 1:
+        # DeepFace builds models lazily into a shared cache; build them here
+        # so the worker threads never race to construct the same model
+        DeepFace.build_model(MODEL_NAME, task="facial_recognition")
+        DeepFace.build_model(DETECTOR_BACKEND, task="face_detector")
+        pool = ThreadPoolExecutor(max_workers=NUM_WORKERS)
+
     for person_name in os.listdir(DATASET_PATH):
 
         person_path = os.path.join(DATASET_PATH, person_name)
@@ -36,33 +90,32 @@ def main():
 
         print(f"\nProcessing {person_name}...")
 
-        for image_name in os.listdir(person_path):
-
-            if image_name.startswith(".") or not image_name.lower().endswith(('.png', '.jpg', '.jpeg')):
-                continue
-
-            image_path = os.path.join(person_path, image_name)
+        image_names = [
+            image_name for image_name in os.listdir(person_path)
+            if not image_name.startswith(".") and image_name.lower().endswith(('.png', '.jpg', '.jpeg'))
+        ]
 
-            try:
-                embedding_objs = DeepFace.represent(
-                    img_path=image_path,
-                    model_name=MODEL_NAME,
-                    detector_backend=DETECTOR_BACKEND,
-                    enforce_detection=True
-                )
+        for start in range(0, len(image_names), BATCH_SIZE):
+            batch = image_names[start:start + BATCH_SIZE]
+            paths = [os.path.join(person_path, image_name) for image_name in batch]
 
-                embedding = np.array(embedding_objs[0]["embedding"])
-
-                # Normalize each embedding first
-                embedding = embedding / (np.linalg.norm(embedding) + 1e-8)
+            if pool is not None:
+                outcomes = pool.map(safe_embed, paths)
+            else:
+                outcomes = map(safe_embed, paths)
 
-                embeddings.append(embedding)
-                valid_images += 1
+            for image_name, image_path, (embedding, error) in zip(batch, paths, outcomes):
+                if error is None:
+                    embeddings.append(embedding)
+                    valid_images += 1
 
-            except ValueError:
-                print(f"  Skipping {image_name}: No face detected.")
-            except Exception as e:
-                print(f"  Error processing {image_name}: {e}")
+                    image_embeddings.append(embedding.astype(np.float32))
+                    image_labels.append(person_name)
+                    image_paths.append(image_path)
+                elif isinstance(error, ValueError):
+                    print(f"  Skipping {image_name}: No face detected.")
+                else:
+                    print(f"  Error processing {image_name}: {error}")
 
         # Quality Control
         if len(embeddings) >= MIN_IMAGES_REQUIRED:
@@ -84,9 +137,47 @@ def main():
         else:
             print(f"  Skipped {person_name}: Not enough valid images ({len(embeddings)})")
 
-    # Save embeddings
-    with open(ENCODINGS_PATH, "wb") as f:
+    if pool is not None:
+        pool.shutdown()
+
+    face_cache.save()
+
+    # Flag duplicate/colliding identities. The audit is written before the
+    # gallery so a hot-reloading recognize.py always finds matching margins
+    names, matrix, _ = build_gallery(database)
+    report = audit_gallery(
+        names, matrix,
+        collision_similarity=1 - settings.threshold,
+        duplicate_similarity=settings.duplicate_similarity,
+        block_size=settings.similarity_block_size
+    )
+    print_report(report)
+    save_report(report, AUDIT_PATH)
+
+    # Save embeddings atomically so a running recognize.py never reads
+    # a half-written file while hot-reloading the gallery
+    tmp_path = ENCODINGS_PATH + ".tmp"
+    with open(tmp_path, "wb") as f:
         pickle.dump(database, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, ENCODINGS_PATH)
+
+    if image_embeddings:
+        image_matrix = np.stack(image_embeddings)
+    else:
+        image_matrix = np.empty((0, 0), dtype=np.float32)
+
+    os.makedirs(os.path.dirname(IMAGE_EMBEDDINGS_PATH) or ".", exist_ok=True)
+    tmp_path = IMAGE_EMBEDDINGS_PATH + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(
+            f,
+            embeddings=image_matrix,
+            labels=np.array(image_labels, dtype=str),
+            paths=np.array(image_paths, dtype=str)
+        )
+    os.replace(tmp_path, IMAGE_EMBEDDINGS_PATH)
 
     print("\nEmbeddings saved successfully.")
     print(f"Total registered identities: {len(database)}")
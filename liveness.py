@@ -0,0 +1,196 @@
+import time
+
+import cv2
+import numpy as np
+
+
+# ------------------------------------------------
+# Cheap liveness / anti-spoof gate for recognize.py and attendance_api.py
+#
+# Runs on the detected face box before the expensive embedding model:
+#   1. Texture/frequency: printed photos and phone/monitor replays are
+#      either blurry (low Laplacian variance) or carry halftone/moire
+#      patterns (too much energy in the highest spatial frequencies).
+#   2. Blink/motion ("full" mode): consecutive crops are first aligned
+#      (phase correlation) to cancel detector box jitter and rigid motion
+#      of a held-up photo. A blink then shows up as change in the eye band
+#      that the rest of the face does not share; a photo changes evenly
+#      or not at all.
+#
+# A camera face is only embedded while its track has passed both checks
+# and has blinked within the last liveness_recheck seconds, so a track that
+# passed once is re-verified instead of trusted for its whole lifetime.
+# attendance_api.py receives single stills with no track to blink in, so it
+# runs the texture stage alone (check_still). All thresholds are heuristics exposed in settings.py for per-site tuning.
+# ------------------------------------------------
+
+FACE_SIZE = 64
+EYE_BAND = (0.20, 0.50)     # Fraction of face height holding the eyes
+ALIGN_BORDER = 6            # Pixels ignored at the crop edge after alignment
+TRACK_IOU = 0.3             # Overlap needed to treat a box as the same face
+REPORT_INTERVAL = 30.0      # Seconds between printed cost/rejection stats
+
+
+def _iou(a, b):
+    ax2, ay2 = a[0] + a[2], a[1] + a[3]
+    bx2, by2 = b[0] + b[2], b[1] + b[3]
+    iw = max(0, min(ax2, bx2) - max(a[0], b[0]))
+    ih = max(0, min(ay2, by2) - max(a[1], b[1]))
+    inter = iw * ih
+    union = a[2] * a[3] + b[2] * b[3] - inter
+    return inter / union if union > 0 else 0.0
+
+
+class LivenessChecker:
+
+    def __init__(self, settings):
+        self.mode = settings.liveness_mode
+        self.min_sharpness = settings.liveness_min_sharpness
+        self.max_moire = settings.liveness_max_moire
+        self.min_motion = settings.liveness_min_motion
+        self.window = settings.liveness_window
+        self.recheck = settings.liveness_recheck
+
+        # Single face track, matching recognize.py's one-face-per-frame flow
+        self.track_box = None
+        self._reset_track()
+
+        top, bottom = (int(FACE_SIZE * f) for f in EYE_BAND)
+        self.eye_rows = slice(top, bottom)
+        self.hann = cv2.createHanningWindow((FACE_SIZE, FACE_SIZE), cv2.CV_32F)
+
+        # Frequency mask: outer band of the centred spectrum, where natural
+        # faces carry little energy but halftone dots and moire do
+        yy, xx = np.mgrid[:FACE_SIZE, :FACE_SIZE] - FACE_SIZE // 2
+        self.high_freq = np.hypot(yy, xx) > FACE_SIZE * 3 // 8
+
+        self.checks = 0
+        self.passed = 0
+        self.rejected = {"blurry": 0, "moire": 0, "static": 0}
+        self.total_cost = 0.0
+        self.last_report = time.time()
+
+    def _texture(self, gray):
+        sharpness = cv2.Laplacian(gray, cv2.CV_32F).var()
+
+        spectrum = np.abs(np.fft.fftshift(np.fft.fft2(gray - gray.mean())))
+        moire = spectrum[self.high_freq].sum() / (spectrum.sum() + 1e-8)
+
+        if sharpness < self.min_sharpness:
+            return "blurry"
+        if moire > self.max_moire:
+            return "moire"
+        return None
+
+    def _reset_track(self):
+        self.prev_gray = None
+        self.last_blink = None
+        self.still_count = 0
+
+    def _blink_score(self, prev, gray):
+        """Eye-band change beyond the rest of the face, after alignment."""
+        # phaseCorrelate applies the window in place, so hand it copies
+        (dx, dy), _ = cv2.phaseCorrelate(prev.copy(), gray.copy(), self.hann)
+        shift = np.float32([[1, 0, dx], [0, 1, dy]])
+        aligned = cv2.warpAffine(prev, shift, (FACE_SIZE, FACE_SIZE), borderMode=cv2.BORDER_REPLICATE)
+
+        b = ALIGN_BORDER
+        diff = np.abs(gray - aligned)[b:-b, b:-b]
+        eye = np.zeros(diff.shape, dtype=bool)
+        eye[self.eye_rows.start - b:self.eye_rows.stop - b] = True
+
+        # Residual misalignment (scale, rotation, lighting) hits the whole
+        # face; only a local change in the eye band counts as a blink
+        return diff[eye].mean() - diff[~eye].mean()
+
+    def _motion(self, gray):
+        now = time.time()
+
+        if self.prev_gray is not None:
+            if self._blink_score(self.prev_gray, gray) >= self.min_motion:
+                self.last_blink = now
+                self.still_count = 0
+            else:
+                self.still_count += 1
+        self.prev_gray = gray
+
+        if self.last_blink is not None and now - self.last_blink <= self.recheck:
+            return "live"
+        if self.still_count >= self.window:
+            # A full window with no blink or expression change
+            self.still_count = 0
+            return "static"
+        return "pending"
+
+    def _face_gray(self, frame, box):
+        x, y, w, h = box
+        crop = frame[max(y, 0):y + h, max(x, 0):x + w]
+        if crop.size == 0:
+            return None
+
+        gray = cv2.resize(cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY), (FACE_SIZE, FACE_SIZE))
+        return gray.astype(np.float32)
+
+    def check(self, frame, area):
+        """Return "live", "pending" or a rejection reason for the face in area."""
+        if self.mode == "off":
+            return "live"
+
+        start = time.perf_counter()
+
+        box = (area["x"], area["y"], area["w"], area["h"])
+        if self.track_box is None or _iou(box, self.track_box) < TRACK_IOU:
+            self._reset_track()
+        self.track_box = box
+
+        gray = self._face_gray(frame, box)
+        if gray is None:
+            return "pending"
+
+        status = self._texture(gray)
+        if status is None:
+            status = "live" if self.mode == "texture" else self._motion(gray)
+
+        self._record(status, start)
+        return status
+
+    def check_still(self, image, area):
+        """Texture-only verdict for a single uploaded image.
+
+        A still has no track to blink in, so "full" mode falls back to the
+        texture stage here. Returns "live" or a rejection reason.
+        """
+        if self.mode == "off":
+            return "live"
+
+        start = time.perf_counter()
+
+        gray = self._face_gray(image, (area["x"], area["y"], area["w"], area["h"]))
+        status = "blurry" if gray is None else (self._texture(gray) or "live")
+
+        self._record(status, start)
+        return status
+
+    def _record(self, status, start):
+        self.checks += 1
+        self.total_cost += time.perf_counter() - start
+        if status == "live":
+            self.passed += 1
+        elif status in self.rejected:
+            self.rejected[status] += 1
+
+        if time.time() - self.last_report >= REPORT_INTERVAL:
+            print(self.report())
+            self.last_report = time.time()
+
+    def report(self):
+        if not self.checks:
+            return "Liveness: no faces checked."
+
+        rejected = sum(self.rejected.values())
+        cost_ms = 1000.0 * self.total_cost / self.checks
+        reasons = ", ".join(f"{k} {v}" for k, v in self.rejected.items())
+        return (f"Liveness: {self.checks} checks, {cost_ms:.2f} ms avg, "
+                f"{self.passed} passed to embedder, {rejected} rejected "
+                f"({100.0 * rejected / self.checks:.1f}%: {reasons}), "
+                f"{self.checks - self.passed} embeddings skipped")
@@ -2,29 +2,83 @@ import os
 import csv
 import time
 import gc
+import threading
 from datetime import datetime
+
+from settings import load_settings, SettingsError
+from attendance_matrix import from_records, save_matrix
  
-DATASET_PATH = "dataset"
-ATTENDANCE_PATH = "attendance"
 RECORDS_PATH = "records"
 MAIN_FILE = os.path.join(RECORDS_PATH, "main_list.csv")
+MATRIX_FILE = os.path.join(RECORDS_PATH, "attendance_matrix.npz")
 # ==========================================
 
+_mark_lock = threading.Lock()
+_settings = None
+
+
+# ------------------------------------------------
+# Configured paths (settings are read on first use, not at import, so
+# importing this module never fails on a bad config file)
+# ------------------------------------------------
+def _get_settings():
+    global _settings
+    if _settings is None:
+        _settings = load_settings()
+    return _settings
+
+
+def get_dataset_path():
+    return _get_settings().dataset_path
+
+
+def get_attendance_path():
+    return _get_settings().attendance_path
+
+
+# ------------------------------------------------
+# Mark Attendance (used by recognize.py and attendance_api.py)
+# ------------------------------------------------
+def mark_attendance(name):
+    attendance_path = get_attendance_path()
+    today = datetime.now().strftime("%Y-%m-%d")
+    file_path = os.path.join(attendance_path, f"{today}.csv")
+
+    with _mark_lock:
+        os.makedirs(attendance_path, exist_ok=True)
+
+        if not os.path.exists(file_path):
+            with open(file_path, "w") as f:
+                f.write("Name,Time\n")
+
+        with open(file_path, "r") as f:
+            lines = f.readlines()
+
+        if any(line.split(",")[0].strip() == name for line in lines[1:]):
+            return False
+
+        with open(file_path, "a") as f:
+            time_now = datetime.now().strftime("%H:%M:%S")
+            f.write(f"{name},{time_now}\n")
+
+    return True
+
  
 def get_registered_students():
-    if not os.path.exists(DATASET_PATH):
+    dataset_path = get_dataset_path()
+    if not os.path.exists(dataset_path):
         return []
 
     return sorted([
         name.strip()
-        for name in os.listdir(DATASET_PATH)
-        if os.path.isdir(os.path.join(DATASET_PATH, name))
+        for name in os.listdir(dataset_path)
+        if os.path.isdir(os.path.join(dataset_path, name))
     ])
 
  
 def get_today_attendance():
     today = datetime.now().strftime("%Y-%m-%d")
-    today_file = os.path.join(ATTENDANCE_PATH, f"{today}.csv")
+    today_file = os.path.join(get_attendance_path(), f"{today}.csv")
 
     present_students = set()
 
@@ -76,6 +130,9 @@ def save_main_records(header, rows):
         writer.writerow(header)
         writer.writerows(rows)
 
+    # Bit-packed copy for fast reporting (attendance_report.py)
+    save_matrix(MATRIX_FILE, *from_records(header, rows))
+
 
 # ------------------------------------------------
 # 5. Update Main Records
@@ -163,7 +220,8 @@ def generate_today_summary():
 # 7. Clear Attendance Folder (Delete and Recreate)
 # ------------------------------------------------
 def clear_attendance_folder():
-    if not os.path.exists(ATTENDANCE_PATH):
+    attendance_path = get_attendance_path()
+    if not os.path.exists(attendance_path):
         return
 
     print("Cleaning attendance folder...")
@@ -173,7 +231,7 @@ def clear_attendance_folder():
 
     try:
         # Delete entire attendance folder
-        for root, dirs, files in os.walk(ATTENDANCE_PATH):
+        for root, dirs, files in os.walk(attendance_path):
             for file in files:
                 file_path = os.path.join(root, file)
                 try:
@@ -191,6 +249,12 @@ def clear_attendance_folder():
 # MAIN
 # ------------------------------------------------
 def main():
+    try:
+        _get_settings()
+    except SettingsError as e:
+        print(f"Configuration error: {e}")
+        return
+
     print("Processing Attendance Data...")
     update_records()
     generate_today_summary()
@@ -1,32 +1,44 @@
 import cv2
-import pickle
-import numpy as np
 from deepface import DeepFace
-from datetime import datetime
 import os
 import time
 import threading
 
+from settings import load_settings, SettingsError
+from face_gallery import get_stamp, load_gallery, match_batch
+from manage_records import mark_attendance
+from face_cache import face_to_bgr
+from liveness import LivenessChecker
+
 
 def main():
 
     # ================= CONFIGURATION =================
-    DETECTOR = "opencv"  
-    MODEL_NAME = "Facenet512"
-    THRESHOLD = 0.35  
+    try:
+        settings = load_settings()
+    except SettingsError as e:
+        print(f"Configuration error: {e}")
+        return
+
+    DETECTOR = settings.recognition_detector
+    MODEL_NAME = settings.model_name
+    THRESHOLD = settings.threshold
 
-    ENCODINGS_PATH = "encodings/embeddings.pkl"
-    ATTENDANCE_PATH = "attendance"
+    ENCODINGS_PATH = settings.encodings_path
+    ATTENDANCE_PATH = settings.attendance_path
+    RELOAD_INTERVAL = settings.reload_interval
+    INFERENCE_INTERVAL = settings.inference_interval
+    AUDIT_PATH = settings.gallery_audit_path
+    MATCH_MARGIN = settings.match_margin
     # =================================================
 
     os.makedirs(ATTENDANCE_PATH, exist_ok=True)
 
     print("Loading Database...")
-    database = {}
+    loaded_stamp = get_stamp(ENCODINGS_PATH)
     try:
-        with open(ENCODINGS_PATH, "rb") as f:
-            database = pickle.load(f)
-        print(f"Database loaded with {len(database)} people.")
+        gallery = load_gallery(ENCODINGS_PATH, AUDIT_PATH)
+        print(f"Database loaded with {len(gallery[0])} people.")
     except FileNotFoundError:
         print("Error: Embeddings file not found! Please run training first.")
         return
@@ -39,67 +51,93 @@ def main():
     feedback_message = ""
     show_confirmation_until = 0
 
+    last_inference = 0.0
+    liveness_status = "live"
+    liveness = LivenessChecker(settings)
+
+    # Hot-reload state: the watcher fills pending_gallery, the video loop
+    # swaps it in between frames
+    pending_gallery = None
+    reload_lock = threading.Lock()
+    stop_event = threading.Event()
+
     # ---------------- HELPER FUNCTIONS ----------------
 
-    def cosine_similarity(a, b):
-        return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b) + 1e-8)
+    def find_best_match(embedding, gallery):
+        return match_batch([embedding], gallery, MATCH_MARGIN)[0]
 
-    def mark_attendance_csv(name):
-        today = datetime.now().strftime("%Y-%m-%d")
-        file_path = os.path.join(ATTENDANCE_PATH, f"{today}.csv")
+    # --- GALLERY WATCHER ---
+    def encodings_watcher():
+        nonlocal pending_gallery
 
-        if not os.path.exists(file_path):
-            with open(file_path, "w") as f:
-                f.write("Name,Time\n")
+        last_stamp = loaded_stamp
 
-        with open(file_path, "r") as f:
-            lines = f.readlines()
+        while not stop_event.wait(RELOAD_INTERVAL):
+            stamp = get_stamp(ENCODINGS_PATH)
+            if stamp is None or stamp == last_stamp:
+                continue
 
-        if any(name in line for line in lines):
-            return False
+            try:
+                new_gallery = load_gallery(ENCODINGS_PATH, AUDIT_PATH)
+            except Exception as e:
+                # Retry on the next tick
+                print(f"Gallery reload failed: {e}")
+                continue
 
-        with open(file_path, "a") as f:
-            time_now = datetime.now().strftime("%H:%M:%S")
-            f.write(f"{name},{time_now}\n")
+            last_stamp = stamp
+            with reload_lock:
+                pending_gallery = new_gallery
 
-        return True
+            print(f"New embeddings detected ({len(new_gallery[0])} people). Swapping gallery...")
 
     # --- BACKGROUND WORKER ---
-    def recognition_worker(frame_copy):
+    def recognition_worker(frame_copy, gallery):
         nonlocal processing_active
         nonlocal detected_name
         nonlocal detected_score
         nonlocal face_location
         nonlocal feedback_message
         nonlocal show_confirmation_until
+        nonlocal liveness_status
 
         try:
-            results = DeepFace.represent(
+            # Detect first; the embedding model only runs on live faces
+            faces = DeepFace.extract_faces(
                 img_path=frame_copy,
-                model_name=MODEL_NAME,
                 detector_backend=DETECTOR,
-                enforce_detection=False
+                enforce_detection=False,
+                align=True
             )
 
-            if len(results) > 0:
-                result = results[0]
-                face_location = result["facial_area"]
-                embedding = result["embedding"]
+            h_frame, w_frame = frame_copy.shape[:2]
+            area = faces[0]["facial_area"] if faces else None
 
-                best_match = "Unknown"
-                best_score = -1
+            # With enforce_detection=False DeepFace falls back to the whole frame
+            if area and (area["w"], area["h"]) != (w_frame, h_frame):
+                face_location = area
+                liveness_status = liveness.check(frame_copy, area)
 
-                for name, db_embedding in database.items():
-                    score = cosine_similarity(embedding, db_embedding)
-                    if score > best_score:
-                        best_score = score
-                        best_match = name
+                if liveness_status != "live":
+                    detected_name = "Unknown"
+                    detected_score = 0
+                    processing_active = False
+                    return
+
+                results = DeepFace.represent(
+                    img_path=face_to_bgr(faces[0]["face"]),
+                    model_name=MODEL_NAME,
+                    detector_backend="skip",
+                    enforce_detection=False
+                )
+                embedding = results[0]["embedding"]
+
+                best_match, best_score = find_best_match(embedding, gallery)
 
-                if best_score > (1 - THRESHOLD):
+                if best_match != "Unknown" and best_score > (1 - THRESHOLD):
                     detected_name = best_match
                     detected_score = best_score
 
-                    was_new = mark_attendance_csv(best_match)
+                    was_new = mark_attendance(best_match)
 
                     if was_new:
                         feedback_message = f"MARKED: {best_match}"
@@ -117,9 +155,11 @@ def main():
 
     # ---------------- MAIN VIDEO LOOP ----------------
 
-    cap = cv2.VideoCapture(0)
-    cap.set(3, 640)
-    cap.set(4, 480)
+    cap = cv2.VideoCapture(settings.camera_index)
+    cap.set(3, settings.capture_width)
+    cap.set(4, settings.capture_height)
+
+    threading.Thread(target=encodings_watcher, daemon=True).start()
 
     print("Starting Camera... Press ESC to exit.")
 
@@ -128,12 +168,20 @@ def main():
         if not ret:
             break
 
-        # Start thread if idle
-        if not processing_active:
+        # Swap in a retrained gallery between frames
+        if pending_gallery is not None:
+            with reload_lock:
+                gallery = pending_gallery
+                pending_gallery = None
+            print(f"Gallery updated: {len(gallery[0])} people.")
+
+        # Start thread if idle and the inference interval has passed
+        if not processing_active and time.time() - last_inference >= INFERENCE_INTERVAL:
             processing_active = True
+            last_inference = time.time()
             thread = threading.Thread(
                 target=recognition_worker,
-                args=(frame.copy(),)
+                args=(frame.copy(), gallery)
             )
             thread.start()
 
@@ -149,6 +197,12 @@ def main():
             if detected_name != "Unknown":
                 label = f"{detected_name} ({detected_score:.2f})"
                 color = (0, 255, 0)
+            elif liveness_status == "pending":
+                label = "Checking liveness... please blink"
+                color = (0, 255, 255)
+            elif liveness_status != "live":
+                label = f"Rejected: {liveness_status}"
+                color = (0, 0, 255)
             else:
                 label = "Scanning..."
                 color = (0, 255, 255)
@@ -173,6 +227,8 @@ def main():
         if cv2.waitKey(1) & 0xFF == 27:
             break
 
+    stop_event.set()
+    print(liveness.report())
     cap.release()
     cv2.destroyAllWindows()
 
@@ -3,6 +3,8 @@ import os
 import time
 import sys
 
+from settings import load_settings, SettingsError
+
 
 def main():
 
@@ -13,7 +15,13 @@ def main():
         print("Error: Student name not provided.")
         return
 
-    SAVE_PATH = os.path.join("dataset", STUDENT_NAME)
+    try:
+        settings = load_settings()
+    except SettingsError as e:
+        print(f"Configuration error: {e}")
+        return
+
+    SAVE_PATH = os.path.join(settings.dataset_path, STUDENT_NAME)
 
     # ================= CONFIGURATION =================
     STAGES = [
@@ -24,8 +32,8 @@ def main():
         "5_HEAD_DOWN"
     ]
 
-    PHOTOS_PER_STAGE = 7
-    TIME_GAP = 0.5
+    PHOTOS_PER_STAGE = settings.photos_per_stage
+    TIME_GAP = settings.time_gap
     # =================================================
 
     os.makedirs(SAVE_PATH, exist_ok=True)
@@ -34,9 +42,9 @@ def main():
         cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
     )
 
-    cap = cv2.VideoCapture(0)
-    cap.set(3, 640)
-    cap.set(4, 480)
+    cap = cv2.VideoCapture(settings.camera_index)
+    cap.set(3, settings.capture_width)
+    cap.set(4, settings.capture_height)
 
     stage_index = 0
 
@@ -0,0 +1,222 @@
+import json
+import os
+from dataclasses import dataclass, field, fields, asdict
+
+
+# ================= FILES =================
+# settings.json holds the shared defaults for every install, while
+# site_settings.json holds the per-site overrides edited from app.py.
+# Values are layered: built-in defaults < settings.json < site_settings.json
+CONFIG_FOLDER = "config"
+SETTINGS_FILE = "settings.json"
+SITE_SETTINGS_FILE = "site_settings.json"
+# =========================================
+
+
+class SettingsError(ValueError):
+    pass
+
+
+def _option(default, kind, help_text, minimum=None, maximum=None, choices=None):
+    return field(default=default, metadata={
+        "type": kind,
+        "help": help_text,
+        "min": minimum,
+        "max": maximum,
+        "choices": choices,
+    })
+
+
+@dataclass
+class Settings:
+    # ---- Paths ----
+    dataset_path: str = _option("dataset", str, "Folder with one sub-folder of photos per student")
+    encodings_path: str = _option("encodings/embeddings.pkl", str, "Trained gallery file")
+    image_embeddings_path: str = _option("encodings/image_embeddings.npz", str,
+                                         "Per-image embeddings used for threshold calibration")
+    gallery_audit_path: str = _option("encodings/gallery_audit.json", str,
+                                      "Collision report and per-identity neighbour margins")
+    attendance_path: str = _option("attendance", str, "Folder for daily attendance CSVs")
+    face_cache_path: str = _option("cache/faces", str, "Cached aligned face crops used by training")
+
+    # ---- Models ----
+    model_name: str = _option("Facenet512", str, "DeepFace embedding model")
+    training_detector: str = _option("retinaface", str, "Face detector used by generate_embeddings.py")
+    recognition_detector: str = _option("opencv", str, "Face detector used by recognize.py")
+
+    # ---- Recognition ----
+    threshold: float = _option(0.35, float, "Cosine distance threshold for a match", 0.0, 1.0)
+    inference_interval: float = _option(0.0, float, "Minimum seconds between recognition passes", 0.0, 60.0)
+    reload_interval: float = _option(2.0, float, "Seconds between checks for a retrained gallery", 0.1, 3600.0)
+    match_margin: float = _option(0.05, float, "Score gap required over an at-risk identity's neighbour",
+                                  0.0, 1.0)
+
+    # ---- Liveness ----
+    liveness_mode: str = _option("full", str, "Anti-spoof gate: 'full' (texture + blink/motion), 'texture' or 'off'",
+                                 choices=("full", "texture", "off"))
+    liveness_min_sharpness: float = _option(20.0, float, "Minimum Laplacian variance of a live face crop",
+                                            0.0, 10000.0)
+    liveness_max_moire: float = _option(0.35, float, "Maximum high-frequency energy ratio (moire/halftone)",
+                                        0.0, 1.0)
+    liveness_min_motion: float = _option(6.0, float, "Eye-band change beyond the rest of the face (0-255) that counts as a blink",
+                                         0.0, 255.0)
+    liveness_window: int = _option(8, int, "Observations allowed for a blink/motion before rejecting", 2, 100)
+    liveness_recheck: float = _option(10.0, float, "Seconds a blink keeps a face verified before re-checking",
+                                      0.5, 600.0)
+
+    # ---- Camera ----
+    camera_index: int = _option(0, int, "OpenCV camera index", 0, 16)
+    capture_width: int = _option(640, int, "Capture width in pixels", 160, 3840)
+    capture_height: int = _option(480, int, "Capture height in pixels", 120, 2160)
+
+    # ---- Training ----
+    min_images_required: int = _option(5, int, "Valid photos needed to register a student", 1, 1000)
+    num_workers: int = _option(1, int, "Parallel embedding workers during training", 1, 64)
+    batch_size: int = _option(32, int, "Images submitted to the workers at a time", 1, 4096)
+    duplicate_similarity: float = _option(0.85, float, "Identity similarity reported as a merge candidate",
+                                          0.0, 1.0)
+
+    # ---- Evaluation ----
+    similarity_block_size: int = _option(1024, int, "Rows/columns per block in all-pairs similarity passes",
+                                         16, 65536)
+
+    # ---- HTTP API ----
+    api_host: str = _option("127.0.0.1", str, "Address attendance_api.py listens on")
+    api_port: int = _option(8000, int, "Port attendance_api.py listens on", 1, 65535)
+    api_batch_size: int = _option(8, int, "Max uploaded images recognized per batch", 1, 256)
+    api_batch_window: float = _option(0.02, float, "Seconds to wait for a batch to fill", 0.0, 1.0)
+    api_max_upload_mb: int = _option(10, int, "Largest accepted image upload in MB", 1, 100)
+
+    # ---- Registration ----
+    photos_per_stage: int = _option(7, int, "Photos captured per registration stage", 1, 100)
+    time_gap: float = _option(0.5, float, "Seconds between registration photos", 0.0, 10.0)
+
+
+def _coerce(spec, value):
+    kind = spec.metadata["type"]
+
+    # bool is a subclass of int, reject it explicitly
+    if isinstance(value, bool):
+        raise SettingsError(f"{spec.name}: expected {kind.__name__}, got {value!r}")
+
+    try:
+        if kind is int:
+            if isinstance(value, float) and not value.is_integer():
+                raise ValueError
+            value = int(value)
+        elif kind is float:
+            value = float(value)
+        else:
+            value = str(value).strip()
+    except (TypeError, ValueError):
+        raise SettingsError(f"{spec.name}: expected {kind.__name__}, got {value!r}")
+
+    minimum = spec.metadata["min"]
+    maximum = spec.metadata["max"]
+    choices = spec.metadata["choices"]
+
+    if minimum is not None and value < minimum:
+        raise SettingsError(f"{spec.name}: {value} is below the minimum of {minimum}")
+    if maximum is not None and value > maximum:
+        raise SettingsError(f"{spec.name}: {value} is above the maximum of {maximum}")
+    if choices is not None and value not in choices:
+        raise SettingsError(f"{spec.name}: {value!r} is not one of {', '.join(choices)}")
+    if kind is str and not value:
+        raise SettingsError(f"{spec.name}: must not be empty")
+
+    return value
+
+
+def validate(values):
+    """Check a dict of raw values against the schema and return the coerced dict."""
+    specs = {spec.name: spec for spec in fields(Settings)}
+
+    unknown = sorted(set(values) - set(specs))
+    if unknown:
+        raise SettingsError(f"Unknown setting(s): {', '.join(unknown)}")
+
+    return {name: _coerce(specs[name], value) for name, value in values.items()}
+
+
+def _read_layer(path):
+    if not os.path.exists(path):
+        return {}
+
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+    except json.JSONDecodeError as e:
+        raise SettingsError(f"{path}: invalid JSON ({e})")
+
+    if not isinstance(data, dict):
+        raise SettingsError(f"{path}: expected a JSON object")
+
+    try:
+        return validate(data)
+    except SettingsError as e:
+        raise SettingsError(f"{path}: {e}")
+
+
+def load_shared_settings(config_folder=CONFIG_FOLDER):
+    """Defaults plus settings.json, without the per-site overrides."""
+    values = asdict(Settings())
+    values.update(_read_layer(os.path.join(config_folder, SETTINGS_FILE)))
+    return Settings(**values)
+
+
+def load_settings(config_folder=CONFIG_FOLDER):
+    values = asdict(load_shared_settings(config_folder))
+    values.update(_read_layer(os.path.join(config_folder, SITE_SETTINGS_FILE)))
+    return Settings(**values)
+
+
+def save_site_settings(values, config_folder=CONFIG_FOLDER):
+    """Validate and merge values into the site overrides.
+
+    Only values that differ from the shared settings are kept, so a site
+    file never pins a default that settings.json later changes.
+    """
+    path = os.path.join(config_folder, SITE_SETTINGS_FILE)
+
+    merged = _read_layer(path)
+    merged.update(validate(values))
+    shared = asdict(load_shared_settings(config_folder))
+    overrides = {name: value for name, value in merged.items() if shared[name] != value}
+
+    os.makedirs(config_folder, exist_ok=True)
+    tmp_path = path + ".tmp"
+
+    with open(tmp_path, "w") as f:
+        json.dump(overrides, f, indent=4, sort_keys=True)
+    os.replace(tmp_path, path)
+
+    return load_settings(config_folder)
+
+
+def describe():
+    """(name, type, help) for every setting, in schema order."""
+    return [(spec.name, spec.metadata["type"], spec.metadata["help"]) for spec in fields(Settings)]
+
+
+# First setting of each "# ---- Section ----" group in the Settings schema
+SECTION_STARTS = {
+    "dataset_path": "Paths",
+    "model_name": "Models",
+    "threshold": "Recognition",
+    "liveness_mode": "Liveness",
+    "camera_index": "Camera",
+    "min_images_required": "Training",
+    "similarity_block_size": "Evaluation",
+    "api_host": "HTTP API",
+    "photos_per_stage": "Registration",
+}
+
+
+def describe_sections():
+    """(section, [(name, type, help), ...]) in schema order."""
+    sections = []
+    for item in describe():
+        if item[0] in SECTION_STARTS or not sections:
+            sections.append((SECTION_STARTS.get(item[0], "General"), []))
+        sections[-1][1].append(item)
+    return sections